@@ -3,9 +3,11 @@ from typing import List
 
 
 from nonebot import NoneBot
+from hoshino import priv
 from hoshino.typing import CQEvent
 from .maicore import *
 from .database import UserDatabase
+from .watchdog import watchdog
 from . import sv
 
 
@@ -18,6 +20,7 @@ bindwx = sv.on_prefix(['bindwx', '微信绑定'])
 binddf = sv.on_prefix(['binddf', '水鱼绑定'])
 bindlx = sv.on_prefix(['bindlx', '落雪绑定'])
 update = sv.on_prefix(['wmupdate', '上传分数', '传分', '导'])
+loopwatch = sv.on_prefix(['loopwatch', '卡顿监控'])
 
 
 async def get_db() -> UserDatabase:
@@ -196,3 +199,42 @@ async def _(bot: NoneBot, ev: CQEvent):
         msg = '只有私聊才能进行绑定操作哦'
 
     await bot.send(ev, msg, at_sender=False)
+
+
+@loopwatch
+async def _(bot: NoneBot, ev: CQEvent):
+    if not priv.check_priv(ev, priv.SUPERUSER):
+        return
+
+    args: List[str] = ev.message.extract_plain_text().strip().split()
+    msg = None
+    if len(args) == 1 and args[0] == '帮助':
+        msg = '卡顿监控/loopwatch(不带斜杠) [开启 [阈值秒数]|关闭|查看|清空]: 监控插件协程对事件循环的阻塞，仅限超级用户使用'
+    elif len(args) in (1, 2) and args[0] == '开启':
+        if len(args) == 2:
+            try:
+                threshold = float(args[1])
+            except ValueError:
+                threshold = 0
+            if threshold <= 0:
+                await bot.send(ev, '请提供正确格式的阈值秒数', at_sender=False)
+                return
+            watchdog.threshold = threshold
+        watchdog.start()
+        msg = f'卡顿监控已开启，阈值{watchdog.threshold}秒'
+    elif len(args) == 1 and args[0] == '关闭':
+        watchdog.stop()
+        msg = '卡顿监控已关闭'
+    elif len(args) == 1 and args[0] == '清空':
+        watchdog.stalls.clear()
+        msg = '卡顿记录已清空'
+    elif len(args) == 0 or (len(args) == 1 and args[0] == '查看'):
+        stalls = watchdog.dump()
+        if stalls:
+            await send_forward_msg(bot, ev, stalls, name="卡顿记录")
+            return
+        msg = f'卡顿监控{"运行中" if watchdog.running else "未开启"}，暂无卡顿记录'
+    else:
+        return
+
+    await bot.send(ev, msg, at_sender=False)
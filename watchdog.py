@@ -0,0 +1,105 @@
+import asyncio, threading, time, sys, traceback
+from collections import deque
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Optional, NamedTuple
+
+
+from . import log
+
+
+Root: Path = Path(__file__).parent
+
+
+class Stall(NamedTuple):
+    time: datetime      # 卡顿开始时间
+    lag: float          # 事件循环延迟(秒)
+    func: str           # 归因到的插件函数
+    stack: list[str]    # 卡顿时事件循环线程的调用栈
+
+
+class LoopWatchdog:
+    """事件循环卡顿监控：由心跳协程测量事件循环延迟，由监控线程在卡顿期间抓取事件循环线程的调用栈"""
+    def __init__(self, threshold: float = 0.5, interval: float = 0.1, maxlen: int = 20) -> None:
+        self.threshold = threshold
+        self.interval = interval
+        self.stalls: deque[Stall] = deque(maxlen=maxlen)
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._loop_thread_id: Optional[int] = None
+        self._beat = 0.0
+        self._pending: Optional[list[traceback.FrameSummary]] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """在事件循环中启动监控，需在协程内调用"""
+        if self.running:
+            return
+        loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._beat = time.monotonic()
+        self._pending = None
+        self._stop.clear()
+        self._task = loop.create_task(self._heartbeat())
+        self._thread = threading.Thread(target=self._monitor, name='maimai-loop-watchdog', daemon=True)
+        self._thread.start()
+        log.info(f"事件循环卡顿监控已开启，阈值 {self.threshold}s")
+
+    def stop(self) -> None:
+        if not self.running:
+            return
+        self._stop.set()
+        self._task.cancel()
+        self._task = None
+        self._thread = None
+        log.info("事件循环卡顿监控已关闭")
+
+    async def _heartbeat(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = now - self._beat - self.interval
+            with self._lock:
+                self._beat = now
+                frames, self._pending = self._pending, None
+            if lag > self.threshold:
+                self._record(lag, frames or [])
+
+    def _monitor(self) -> None:
+        # 事件循环被阻塞时心跳无法运行，因此需要在独立线程中抓取阻塞处的调用栈
+        while not self._stop.wait(self.interval / 2):
+            with self._lock:
+                if self._pending is not None or time.monotonic() - self._beat - self.interval <= self.threshold:
+                    continue
+                frame = sys._current_frames().get(self._loop_thread_id)
+                if frame is not None:
+                    self._pending = traceback.extract_stack(frame)
+
+    def _record(self, lag: float, frames: list[traceback.FrameSummary]) -> None:
+        func = self._attribute(frames)
+        stall = Stall(datetime.now() - timedelta(seconds=lag), lag, func, traceback.format_list(frames))
+        self.stalls.append(stall)
+        log.warning(f"事件循环卡顿 {lag:.3f}s，归因于 {func}")
+
+    @staticmethod
+    def _attribute(frames: list[traceback.FrameSummary]) -> str:
+        """从栈顶向下查找第一个属于本插件的帧"""
+        for f in reversed(frames):
+            path = Path(f.filename)
+            if path.parent == Root and path.name != Path(__file__).name:
+                return f"{path.stem}.{f.name}:{f.lineno}"
+        return '未知(未捕获到本插件的调用栈)'
+
+    def dump(self) -> list[str]:
+        return [
+            f"[{s.time.strftime(r'%Y-%m-%d %H:%M:%S')}] 卡顿 {s.lag:.3f}s，归因于 {s.func}\n{''.join(s.stack[-10:]).rstrip()}"
+            for s in self.stalls
+        ]
+
+
+watchdog = LoopWatchdog()